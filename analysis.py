@@ -11,14 +11,21 @@ import queries
 
 
 DB_FILE_NAME = "chat.db"
+# Memory-map up to 256 MiB of the database, so large reads are served from the
+# page cache instead of one read() syscall per page.
+DB_MMAP_SIZE = 256 * 1024 * 1024
 
 def create_connection(db_file: str) -> sqlite3.Connection:
-	"""Creates a database connection from file."""
+	"""Creates a read-only database connection from file, or None on failure."""
 	conn = None
 	try:
-		conn = sqlite3.connect(db_file)
-	except Error as e:
-		print(e)
+		conn = sqlite3.connect(f"file:{db_file}?mode=ro", uri=True)
+		conn.execute(queries.mmap_size(DB_MMAP_SIZE))
+	except Error as err:
+		print(f"{bcolors.FAIL}sqlite3 Error: {err}{bcolors.ENDC}")
+		if conn is not None:
+			conn.close()
+			conn = None
 
 	return conn
 
@@ -38,25 +45,45 @@ def get_columns_for_table(conn: sqlite3.Connection, table_name: str) -> list:
 	cur = conn.cursor()
 	# TODO: add warning (and verify) that `pragma_table_info` and other pragma functions
 	# are only available in sqlite3 versions >=3.16.0
-	query = queries.columns_for_table_q(table_name)
-	cur = conn.execute(query)
+	query = queries.columns_for_table_q()
+	cur = conn.execute(query, (table_name,))
 
 	return cur.fetchall()
 
-def get_row_counts_by_table(conn: sqlite3.Connection, table_names: list) -> list:
+def get_approx_row_counts(conn: sqlite3.Connection) -> dict:
+	"""Returns row counts recorded in `sqlite_stat1`, without scanning any table."""
 	cur = conn.cursor()
-	query = queries.rows_count(table_names)
-	cur.execute(query)
-	row_counts = cur.fetchall()[0]
-	# print(f"zip 1: {row_counts}\n\n")
-	# print(f"zip 2: {table_names}\n\n")
+	query = queries.approx_rows_count()
+	try:
+		cur.execute(query)
+	except sqlite3.OperationalError:
+		# No `sqlite_stat1` table: ANALYZE has never been run on this database.
+		return {}
+
+	return dict(cur.fetchall())
+
+def get_row_counts_by_table(conn: sqlite3.Connection, table_names: list, exact: bool = True) -> list:
+	"""Returns (table name, row count) pairs.
 
-	return list(zip(table_names, row_counts))
+	With `exact=False`, counts are read from `sqlite_stat1` where available and
+	only the remaining tables are counted with COUNT(*)."""
+	approx_counts = {} if exact else get_approx_row_counts(conn)
+	to_count = [tn for tn in table_names if tn not in approx_counts]
+
+	row_counts = {}
+	if to_count:
+		cur = conn.cursor()
+		query = queries.rows_count(to_count)
+		cur.execute(query)
+		row_counts = dict(zip(to_count, cur.fetchall()[0]))
+	row_counts.update(approx_counts)
+
+	return [(tn, row_counts[tn]) for tn in table_names]
 
 def get_table_creation_query(conn: sqlite3.Connection, table_name: str) -> list:
 	cur = conn.cursor()
-	query = queries.table_creation_query(table_name)
-	cur = conn.execute(query)
+	query = queries.table_creation_query()
+	cur = conn.execute(query, (table_name,))
 
 	return cur.fetchall()
 
@@ -80,7 +107,11 @@ def get_all_contacts(conn: sqlite3.Connection) -> list:
 
 # TODO NEXT STEP: wrap all queries in "as cursor"
 def main2():
-	with closing(sqlite3.connect(f"file:{DB_FILE_NAME}?mode=ro", uri=True)) as conn:
+	conn = create_connection(DB_FILE_NAME)
+	if conn is None:
+		return
+
+	with closing(conn):
 		with closing(conn.cursor()) as cursor:
 			table_names = get_table_names(conn)
 		print(f"Table names:\n")
@@ -96,31 +127,30 @@ def main2():
 
 
 def main():
-	conn = None
-	try:
-		conn = sqlite3.connect(f"file:{DB_FILE_NAME}?mode=ro", uri=True)
-	except sqlite3.Error as err:
-		print(f"{bcolors.FAIL}sqlite3 Error: {err}{bcolors.ENDC}")
+	conn = create_connection(DB_FILE_NAME)
+	if conn is None:
+		return
+
+	with closing(conn):
+		## Database report
+
+		# Table names
+		table_names: list[tuple] = get_table_names(conn)
+		table_names: list[str] = list(map(lambda x: x[0], table_names))
+		print(*table_names, sep="\n")
+
+		# Row counts by table
+		print(f"\nRow counts by table (approximate where `sqlite_stat1` has statistics):\n")
+		row_counts_by_table = get_row_counts_by_table(conn, table_names, exact=False)
+		print(*row_counts_by_table, sep="\n")
 
-	## Database report
-
-	# Table names
-	table_names: list[tuple] = get_table_names(conn)
-	table_names: list[str] = list(map(lambda x: x[0], table_names))
-	print(*table_names, sep="\n")
-
-	# Row counts by table
-	print(f"\nRow counts by table:\n")
-	row_counts_by_table = get_row_counts_by_table(conn, table_names)
-	print(*row_counts_by_table, sep="\n")
-	
-	print(f"\n\nAll column names in `message` table:\n")
-	col_list = get_columns_for_table(conn, 'message')
-	print(col_list)
-	
-	print(f"Creation query for `attachments` table:\n")
-	creation_query = get_table_creation_query(conn, 'attachment')
-	print(creation_query)
+		print(f"\n\nAll column names in `message` table:\n")
+		col_list = get_columns_for_table(conn, 'message')
+		print(col_list)
+
+		print(f"Creation query for `attachments` table:\n")
+		creation_query = get_table_creation_query(conn, 'attachment')
+		print(creation_query)
 
 if __name__ == '__main__':	
 	main()
@@ -1,27 +1,33 @@
 def table_names() -> str:
     return f"SELECT `name` FROM `sqlite_master` WHERE `type`='table';"
 
-# TODO finish function
 def rows_count(table_names: list) -> str:
-    # query draft:
-    # select ( select count(*) from handle)
-    #        ( select count(*) from message)
+    # All counts in a single round-trip:
+    # select ( select count(*) from handle),
+    #        ( select count(*) from message),
     #        ( select count(*) from ...etc...);
-    query: str = f"SELECT "
-    for tn in table_names[:-1]:
-        query += f"(SELECT count(*) FROM {tn}), "
-    query += f"(SELECT count(*) FROM {table_names[-1]});"
-    return query
+    subqueries: str = ", ".join(f"(SELECT count(*) FROM `{tn}`)" for tn in table_names)
+    return f"SELECT {subqueries};"
+
+# `sqlite_stat1` is kept up to date by ANALYZE; `stat` starts with the table's row
+# count, which CAST picks out. Tables without an index have a single row with `idx` NULL.
+def approx_rows_count() -> str:
+    return f"SELECT `tbl`, max(CAST(`stat` AS INTEGER)) FROM `sqlite_stat1` GROUP BY `tbl`;"
+
+def mmap_size(size: int) -> str:
+    return f"PRAGMA mmap_size={int(size)};"
 
 # TODO verify function semantics
 def get_db_size(table_name: str) -> int:
     return f"SELECT page_count * page_size as size FROM pragma_page_count(), pragma_page_size();"
 
-def columns_for_table_q(table_name: str) -> str:
-    return f"SELECT `name` FROM pragma_table_info('{table_name}');"
+# The table name is bound as a `?` parameter, so sqlite3's statement cache
+# reuses one prepared statement for every table.
+def columns_for_table_q() -> str:
+    return f"SELECT `name` FROM pragma_table_info(?);"
 
-def table_creation_query(table_name: str) -> str:
-    return f"SELECT `sql` FROM sqlite_master WHERE `tbl_name`='{table_name}' and `type`='table';"
+def table_creation_query() -> str:
+    return f"SELECT `sql` FROM sqlite_master WHERE `tbl_name`=? and `type`='table';"
 
 # TODO fill in query
 def get_all_contacts() -> str: